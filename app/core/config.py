@@ -96,6 +96,30 @@ Não inclua na resposta os niveis, tipos ou exemplos, identificados na resposta.
         "Power BI": "https://learn.microsoft.com/pt-br/power-bi/",
     }
 
+    # Resposta padrão para perguntas fora do escopo (a mesma instruída no SYSTEM_PROMPT)
+    RESPOSTA_FORA_ESCOPO: str = "Posso te ajudar apenas com dúvidas sobre Análise de Dados, tudo bem?"
+    PERGUNTA_APRESENTACAO: str = "Quem é vc ? Apresente-se."
+
+    # Pré-filtro local de escopo, executado antes de chamar o LLM
+    # (opt-in; em modo sombra só registra o que filtraria e ainda chama o LLM)
+    ESCOPO_PREFILTRO_ATIVO: bool = os.getenv("ESCOPO_PREFILTRO_ATIVO", "false").lower() == "true"
+    ESCOPO_MODO_SOMBRA: bool = os.getenv("ESCOPO_MODO_SOMBRA", "true").lower() == "true"
+    ESCOPO_LIMIAR_CONFIANCA: float = float(os.getenv("ESCOPO_LIMIAR_CONFIANCA", "0.85"))
+    ESCOPO_PRECISAO_MINIMA: float = float(os.getenv("ESCOPO_PRECISAO_MINIMA", "0.95")) # Precisão validada exigida para ativar o classificador
+    ESCOPO_MIN_EXEMPLOS_POR_CLASSE: int = int(os.getenv("ESCOPO_MIN_EXEMPLOS_POR_CLASSE", "20"))
+    ESCOPO_INTERVALO_RETREINO_SEGUNDOS: float = float(os.getenv("ESCOPO_INTERVALO_RETREINO_SEGUNDOS", "300"))
+    ESCOPO_MAX_FILTRADAS: int = int(os.getenv("ESCOPO_MAX_FILTRADAS", "50")) # Perguntas filtradas mantidas em memória
+
+    # Token exigido no header X-Admin-Token pelos endpoints /admin. Vazio desativa esses endpoints.
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Profiling de requisições lentas (opt-in)
+    PROFILING_ATIVO: bool = os.getenv("PROFILING_ATIVO", "false").lower() == "true"
+    PROFILING_LIMIAR_SEGUNDOS: float = float(os.getenv("PROFILING_LIMIAR_SEGUNDOS", "5.0"))
+    PROFILING_INTERVALO_AMOSTRAGEM: float = float(os.getenv("PROFILING_INTERVALO_AMOSTRAGEM", "0.05"))
+    PROFILING_MAX_PERFIS: int = int(os.getenv("PROFILING_MAX_PERFIS", "20"))
+    PROFILING_MAX_PILHAS: int = int(os.getenv("PROFILING_MAX_PILHAS", "10")) # Pilhas mais frequentes guardadas por perfil
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -28,3 +28,37 @@ class CursoModel(BaseModel):
     Curso: str
     Link: str
     Palavras_chave: str = Field(alias="Palavras-chave")
+
+class PilhaAmostradaModel(BaseModel):
+    quadros: List[str]
+    amostras: int
+
+class PerfilRequisicaoModel(BaseModel):
+    pergunta: str
+    ramo: str # banco, escopo, llm, fallback
+    duracao_segundos: float
+    total_amostras: int
+    pilhas_mais_frequentes: List[PilhaAmostradaModel] = []
+    data_hora: datetime = Field(default_factory=datetime.now)
+
+class PerguntaFiltradaModel(BaseModel):
+    pergunta: str
+    confianca: float
+    sombra: bool = False # True se o LLM foi chamado mesmo assim (modo sombra)
+    data_hora: datetime = Field(default_factory=datetime.now)
+
+class EstatisticasEscopoModel(BaseModel):
+    ativo: bool
+    modo_sombra: bool
+    treinado: bool
+    limiar_confianca: float
+    precisao_minima: float
+    min_exemplos_por_classe: int
+    amostras_dentro_escopo: int
+    amostras_fora_escopo: int
+    regularizacao_c: Optional[float] = None
+    precisao_validacao: Optional[float] = None # Validação cruzada no limiar atual
+    cobertura_validacao: Optional[float] = None
+    chamadas_llm_evitadas: int
+    sinalizadas_modo_sombra: int
+    perguntas_filtradas_recentes: List[PerguntaFiltradaModel] = []
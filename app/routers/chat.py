@@ -1,11 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.pydantic_models import PerguntaInputModel, RespostaOutputModel, CursoModel
+import secrets
+from fastapi import APIRouter, HTTPException, Depends, Header
+from app.core.config import settings
+from app.models.pydantic_models import PerguntaInputModel, RespostaOutputModel, CursoModel, PerfilRequisicaoModel, EstatisticasEscopoModel
 from app.services.resposta_service import processar_pergunta_service
+from app.services.profiling_service import perfilar_requisicao, listar_perfis_service, limpar_perfis_service
+from app.services.escopo_service import iniciar_treinamento_escopo, get_estatisticas_escopo_service
 from app.services.curso_service import get_todos_cursos, carregar_cursos_json
-from typing import List
+from typing import List, Optional
 
 router = APIRouter()
 
+def verificar_token_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Protege os endpoints /admin com o header X-Admin-Token. Sem ADMIN_TOKEN configurado eles ficam indisponíveis.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Token de administrador inválido.")
+
+def verificar_prefiltro_escopo_ativo():
+    if not settings.ESCOPO_PREFILTRO_ATIVO:
+        raise HTTPException(status_code=404, detail="Not Found")
+
 @router.post("/pergunta", response_model=RespostaOutputModel)
 async def perguntar_ao_assistente(pergunta_input: PerguntaInputModel):
     """
@@ -16,7 +33,8 @@ async def perguntar_ao_assistente(pergunta_input: PerguntaInputModel):
         # Garante que os cursos sejam carregados antes de processar a pergunta, 
         # pois o processar_pergunta_service pode chamar o sugerir_curso_service
         carregar_cursos_json() # Assegura que os dados dos cursos estão na memória
-        resposta = processar_pergunta_service(pergunta_input)
+        with perfilar_requisicao(pergunta_input.texto_pergunta):
+            resposta = processar_pergunta_service(pergunta_input)
         return resposta
     except Exception as e:
         # Logar o erro e retornar uma HTTP Exception
@@ -38,5 +56,51 @@ async def listar_cursos():
         print(f"Erro no endpoint /cursos: {e}")
         raise HTTPException(status_code=500, detail=f"Ocorreu um erro interno ao buscar os cursos: {str(e)}")
 
+@router.get("/admin/perfis", response_model=List[PerfilRequisicaoModel], dependencies=[Depends(verificar_token_admin)])
+async def listar_perfis_lentos():
+    """
+    Retorna os perfis das últimas requisições a /pergunta que ultrapassaram PROFILING_LIMIAR_SEGUNDOS,
+    do mais recente para o mais antigo. Só é preenchido com PROFILING_ATIVO=true.
+    """
+    return listar_perfis_service()
+
+@router.delete("/admin/perfis", status_code=204, dependencies=[Depends(verificar_token_admin)])
+async def limpar_perfis_lentos():
+    """
+    Esvazia o buffer de perfis de requisições lentas.
+    """
+    limpar_perfis_service()
+
+@router.get(
+    "/admin/escopo",
+    response_model=EstatisticasEscopoModel,
+    dependencies=[Depends(verificar_token_admin), Depends(verificar_prefiltro_escopo_ativo)]
+)
+async def estatisticas_escopo():
+    """
+    Retorna o estado do pré-filtro de escopo, a validação do último treino, quantas chamadas ao LLM
+    ele já evitou e as últimas perguntas filtradas.
+    """
+    return get_estatisticas_escopo_service()
+
+@router.post(
+    "/admin/escopo/treinar",
+    response_model=EstatisticasEscopoModel,
+    status_code=202,
+    dependencies=[Depends(verificar_token_admin), Depends(verificar_prefiltro_escopo_ativo)]
+)
+async def treinar_escopo():
+    """
+    Dispara em segundo plano o retreino do classificador de escopo com o histórico atual da coleção
+    `conversas` e retorna o estado atual. Consulte GET /admin/escopo para ver o resultado.
+    """
+    try:
+        carregar_cursos_json() # As palavras-chave dos cursos fazem parte do vocabulário
+        iniciar_treinamento_escopo()
+        return get_estatisticas_escopo_service()
+    except Exception as e:
+        print(f"Erro no endpoint /admin/escopo/treinar: {e}")
+        raise HTTPException(status_code=500, detail=f"Ocorreu um erro interno ao treinar o classificador de escopo: {str(e)}")
+
 # Adicionar outros endpoints conforme necessário, por exemplo, para status da API, etc.
 
@@ -1,5 +1,6 @@
 import hashlib
 from datetime import datetime
+from typing import Optional
 from app.core.db_config import get_db_collection
 from app.models.pydantic_models import ConversaDBModel
 from app.core.config import settings
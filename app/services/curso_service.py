@@ -5,6 +5,7 @@ from sklearn.metrics.pairwise import cosine_similarity
 from app.models.pydantic_models import CursoModel, CursoSugestaoModel
 from app.core.config import settings
 import os
+from typing import List, Optional
 
 # Caminho para o arquivo JSON de cursos
 # Ajuste o caminho se o seu arquivo estiver em um local diferente dentro da estrutura do projeto
@@ -0,0 +1,279 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.pipeline import Pipeline
+
+from app.core.config import settings
+from app.core.db_config import get_db_collection
+from app.models.pydantic_models import EstatisticasEscopoModel, PerguntaFiltradaModel
+from app.services.curso_service import get_todos_cursos
+
+# Valores de regularização testados a cada treino; fica o que filtra mais perguntas
+# mantendo a precisão validada >= ESCOPO_PRECISAO_MINIMA
+CANDIDATOS_REGULARIZACAO_C = (1.0, 10.0, 100.0)
+MAX_FOLDS_VALIDACAO = 5
+
+# Início estável da recusa instruída no SYSTEM_PROMPT; o LLM às vezes varia o final ("tudo bem?") e a pontuação
+PREFIXO_RECUSA = "Posso te ajudar apenas com dúvidas sobre Análise de Dados"
+
+# Classificador local de escopo, treinado em segundo plano a partir do histórico de conversas
+_classificador: Optional[Pipeline] = None
+_termos_escopo: List[str] = []
+_amostras_dentro = 0
+_amostras_fora = 0
+_regularizacao_c: Optional[float] = None
+_precisao_validacao: Optional[float] = None
+_cobertura_validacao: Optional[float] = None
+_chamadas_llm_evitadas = 0
+_sinalizadas_modo_sombra = 0
+_perguntas_filtradas: Deque[PerguntaFiltradaModel] = deque(maxlen=settings.ESCOPO_MAX_FILTRADAS)
+_escopo_lock = threading.Lock()
+
+_ultima_tentativa_treino: Optional[float] = None
+_thread_treino: Optional[threading.Thread] = None
+
+
+def _normalizar(texto: str) -> str:
+    return texto.lower().strip()
+
+
+def _normalizar_pontuacao(texto: str) -> str:
+    # Minúsculas, sem acentos, pontuação trocada por espaço e espaços colapsados
+    sem_acentos = "".join(
+        c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c)
+    )
+    return " ".join(re.sub(r"[^\w\s]", " ", sem_acentos.lower()).split())
+
+
+def eh_resposta_fora_escopo(resposta: str) -> bool:
+    """Indica se a resposta do LLM é a recusa padrão definida no SYSTEM_PROMPT."""
+    return _normalizar_pontuacao(PREFIXO_RECUSA) in _normalizar_pontuacao(resposta)
+
+
+def _montar_vocabulario() -> List[str]:
+    # Temas com documentação mapeada + nomes e palavras-chave dos cursos
+    termos = [tema for tema in settings.TEMAS_PARA_LINKS]
+    for curso in get_todos_cursos():
+        termos.append(curso.Curso)
+        termos.extend(palavra.strip() for palavra in curso.Palavras_chave.split(","))
+    return [_normalizar(termo) for termo in termos if termo and termo.strip()]
+
+
+def _mencionou_vocabulario(pergunta: str, termos: List[str]) -> bool:
+    pergunta_lower = _normalizar(pergunta)
+    for termo in termos:
+        # (?<!\w)/(?!\w) em vez de \b para casar também termos que terminam em pontuação, ex: "cloud sql (gcp)"
+        if re.search(rf"(?<!\w){re.escape(termo)}(?!\w)", pergunta_lower):
+            return True
+    return False
+
+
+def _novo_classificador(c: float) -> Pipeline:
+    # Sem class_weight="balanced": com poucas recusas no histórico o modelo tende a "dentro do escopo",
+    # que é o erro barato (só custa uma chamada ao LLM)
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, strip_accents="unicode")),
+        ("modelo", LogisticRegression(C=c, max_iter=1000)),
+    ])
+
+
+def _validar_limiar(c: float, textos: List[str], rotulos: List[int], termos: List[str]) -> Tuple[Optional[float], float]:
+    """
+    Estima, por validação cruzada, a precisão (das perguntas filtradas, quantas eram de fato fora do escopo)
+    e a cobertura (das perguntas fora do escopo, quantas seriam filtradas) no ESCOPO_LIMIAR_CONFIANCA atual.
+    A precisão é None quando nenhuma pergunta seria filtrada.
+    """
+    n_folds = min(MAX_FOLDS_VALIDACAO, rotulos.count(0), rotulos.count(1))
+    probabilidades = cross_val_predict(
+        _novo_classificador(c), textos, rotulos,
+        cv=StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=0),
+        method="predict_proba"
+    )[:, 1]
+    # Aplica a mesma lista de termos permitidos usada em produção
+    filtradas = np.array([
+        prob >= settings.ESCOPO_LIMIAR_CONFIANCA and not _mencionou_vocabulario(texto, termos)
+        for texto, prob in zip(textos, probabilidades)
+    ])
+    fora = np.array(rotulos) == 1
+    acertos = int((filtradas & fora).sum())
+
+    precisao = acertos / int(filtradas.sum()) if filtradas.any() else None
+    cobertura = acertos / int(fora.sum())
+    return precisao, cobertura
+
+
+def _treinar_com_validacao(textos: List[str], rotulos: List[int], termos: List[str]):
+    """
+    Retorna (classificador, c, precisão, cobertura). O classificador só é retornado se algum C atingir
+    ESCOPO_PRECISAO_MINIMA na validação cruzada; caso contrário é None e as métricas são as do melhor C.
+    """
+    melhor = None  # (c, precisão, cobertura) aprovado com maior cobertura
+    mais_preciso = (None, None, 0.0)
+    for c in CANDIDATOS_REGULARIZACAO_C:
+        precisao, cobertura = _validar_limiar(c, textos, rotulos, termos)
+        if precisao is not None and (mais_preciso[1] is None or precisao > mais_preciso[1]):
+            mais_preciso = (c, precisao, cobertura)
+        if precisao is not None and precisao >= settings.ESCOPO_PRECISAO_MINIMA:
+            if melhor is None or cobertura > melhor[2]:
+                melhor = (c, precisao, cobertura)
+
+    if melhor is None:
+        return (None,) + mais_preciso
+
+    c, precisao, cobertura = melhor
+    classificador = _novo_classificador(c)
+    classificador.fit(textos, rotulos)
+    return classificador, c, precisao, cobertura
+
+
+def treinar_classificador_escopo_service() -> EstatisticasEscopoModel:
+    """
+    Treina o classificador de escopo com o histórico de conversas. Exemplos dentro do escopo: perguntas
+    respondidas normalmente (e a pergunta de apresentação). Exemplos fora do escopo: perguntas em que o
+    LLM respondeu com a recusa padrão. O vocabulário de temas/cursos não entra no treino; ele funciona
+    como lista de termos sempre permitidos.
+    O classificador só é ativado com ao menos ESCOPO_MIN_EXEMPLOS_POR_CLASSE exemplos de cada classe e
+    precisão validada >= ESCOPO_PRECISAO_MINIMA; fora isso toda pergunta segue para o LLM.
+    """
+    global _classificador, _termos_escopo, _amostras_dentro, _amostras_fora
+    global _regularizacao_c, _precisao_validacao, _cobertura_validacao, _ultima_tentativa_treino
+
+    _ultima_tentativa_treino = time.monotonic()
+    termos = _montar_vocabulario()
+    perguntas_dentro = [settings.PERGUNTA_APRESENTACAO]
+    perguntas_fora = []
+
+    collection = get_db_collection()
+    if collection is not None:
+        try:
+            documentos = list(collection.find({}, {"pergunta": 1, "resposta": 1, "_id": 0}))
+        except Exception as e:
+            print(f"Erro ao buscar histórico para treinar o classificador de escopo: {e}")
+            documentos = []
+        for doc in documentos:
+            pergunta = doc.get("pergunta")
+            if not pergunta:
+                continue
+            if eh_resposta_fora_escopo(doc.get("resposta", "")):
+                perguntas_fora.append(pergunta)
+            else:
+                perguntas_dentro.append(pergunta)
+    else:
+        print("❌ Coleção do MongoDB não disponível. Classificador de escopo não treinado; nova tentativa mais tarde.")
+
+    classificador, c, precisao, cobertura = None, None, None, None
+    minimo = settings.ESCOPO_MIN_EXEMPLOS_POR_CLASSE
+    if len(perguntas_dentro) >= minimo and len(perguntas_fora) >= minimo:
+        textos = [_normalizar(p) for p in perguntas_dentro + perguntas_fora]
+        rotulos = [0] * len(perguntas_dentro) + [1] * len(perguntas_fora)
+        try:
+            classificador, c, precisao, cobertura = _treinar_com_validacao(textos, rotulos, termos)
+        except ValueError as e:
+            print(f"Erro ao treinar o classificador de escopo: {e}")
+            classificador = None
+
+    with _escopo_lock:
+        _classificador = classificador
+        _termos_escopo = termos
+        _amostras_dentro = len(perguntas_dentro)
+        _amostras_fora = len(perguntas_fora)
+        _regularizacao_c = c
+        _precisao_validacao = precisao
+        _cobertura_validacao = cobertura
+
+    if classificador is not None:
+        print(
+            f"✅ Classificador de escopo treinado ({len(perguntas_dentro)} dentro / {len(perguntas_fora)} fora do escopo, C={c}). "
+            f"Validação no limiar {settings.ESCOPO_LIMIAR_CONFIANCA}: precisão {precisao:.2f}, cobertura {cobertura:.2f}."
+        )
+    elif collection is not None:
+        print(
+            f"⚠️ Pré-filtro de escopo desativado: {len(perguntas_dentro)} dentro / {len(perguntas_fora)} fora do escopo "
+            f"(mínimo {minimo} por classe), precisão validada {precisao} (mínimo {settings.ESCOPO_PRECISAO_MINIMA})."
+        )
+    return get_estatisticas_escopo_service()
+
+
+def iniciar_treinamento_escopo():
+    """
+    Dispara o treino do classificador em segundo plano, para que nenhuma requisição pague pela
+    leitura do histórico e pelo ajuste do modelo. Pode ser chamada no startup da aplicação.
+    """
+    global _thread_treino, _ultima_tentativa_treino
+    with _escopo_lock:
+        if _thread_treino is not None and _thread_treino.is_alive():
+            return
+        _ultima_tentativa_treino = time.monotonic()
+        _thread_treino = threading.Thread(target=treinar_classificador_escopo_service, daemon=True)
+        _thread_treino.start()
+
+
+def classificar_fora_escopo(pergunta: str) -> Tuple[bool, float]:
+    """
+    Retorna (fora_do_escopo, confiança). Só considera fora do escopo quando a pergunta não menciona
+    nenhum termo do vocabulário e o classificador tem confiança >= ESCOPO_LIMIAR_CONFIANCA.
+    Enquanto o classificador não estiver pronto, toda pergunta segue para o LLM.
+    """
+    # Treina na primeira chamada e tenta de novo enquanto o treino não resultar em classificador
+    # (MongoDB indisponível, poucos exemplos ou precisão validada abaixo do mínimo)
+    if _classificador is None and (
+        _ultima_tentativa_treino is None
+        or time.monotonic() - _ultima_tentativa_treino >= settings.ESCOPO_INTERVALO_RETREINO_SEGUNDOS
+    ):
+        iniciar_treinamento_escopo()
+
+    classificador, termos = _classificador, _termos_escopo
+    if classificador is None or _mencionou_vocabulario(pergunta, termos):
+        return False, 0.0
+
+    try:
+        confianca = float(classificador.predict_proba([_normalizar(pergunta)])[0][1])
+    except ValueError as e:
+        print(f"Erro ao classificar escopo da pergunta: {e}")
+        return False, 0.0
+    return confianca >= settings.ESCOPO_LIMIAR_CONFIANCA, confianca
+
+
+def registrar_pergunta_filtrada(pergunta: str, confianca: float, sombra: bool):
+    """Registra uma pergunta classificada como fora do escopo. Em modo sombra o LLM ainda é chamado."""
+    global _chamadas_llm_evitadas, _sinalizadas_modo_sombra
+    with _escopo_lock:
+        if sombra:
+            _sinalizadas_modo_sombra += 1
+        else:
+            _chamadas_llm_evitadas += 1
+        _perguntas_filtradas.append(PerguntaFiltradaModel(
+            pergunta=pergunta,
+            confianca=round(confianca, 3),
+            sombra=sombra,
+            data_hora=datetime.now()
+        ))
+
+
+def get_estatisticas_escopo_service() -> EstatisticasEscopoModel:
+    with _escopo_lock:
+        return EstatisticasEscopoModel(
+            ativo=settings.ESCOPO_PREFILTRO_ATIVO,
+            modo_sombra=settings.ESCOPO_MODO_SOMBRA,
+            treinado=_classificador is not None,
+            limiar_confianca=settings.ESCOPO_LIMIAR_CONFIANCA,
+            precisao_minima=settings.ESCOPO_PRECISAO_MINIMA,
+            min_exemplos_por_classe=settings.ESCOPO_MIN_EXEMPLOS_POR_CLASSE,
+            amostras_dentro_escopo=_amostras_dentro,
+            amostras_fora_escopo=_amostras_fora,
+            regularizacao_c=_regularizacao_c,
+            precisao_validacao=_precisao_validacao,
+            cobertura_validacao=_cobertura_validacao,
+            chamadas_llm_evitadas=_chamadas_llm_evitadas,
+            sinalizadas_modo_sombra=_sinalizadas_modo_sombra,
+            perguntas_filtradas_recentes=list(reversed(_perguntas_filtradas))
+        )
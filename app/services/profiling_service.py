@@ -0,0 +1,133 @@
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from app.core.config import settings
+from app.models.pydantic_models import PerfilRequisicaoModel, PilhaAmostradaModel
+
+# Perfis das requisições lentas, em memória. O deque com maxlen descarta
+# automaticamente os mais antigos quando o limite é atingido.
+_perfis_lentos: Deque[PerfilRequisicaoModel] = deque(maxlen=settings.PROFILING_MAX_PERFIS)
+_perfis_lock = threading.Lock()
+
+# Estado da requisição em andamento na thread atual (ramo percorrido em processar_pergunta_service)
+_contexto_local = threading.local()
+
+
+class _AmostradorPilha:
+    """
+    Amostra periodicamente a pilha de uma thread a partir de outra thread.
+    Só é iniciado depois que a requisição ultrapassa o limiar, então requisições
+    rápidas pagam apenas o custo de agendar e cancelar um threading.Timer.
+    """
+
+    def __init__(self, thread_id: int, intervalo: float):
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.amostras: Counter = Counter()
+        self.total_amostras = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join(timeout=1.0)
+
+    def _executar(self):
+        while not self._parar.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            # lookup_lines=False evita ler o código-fonte via linecache a cada amostra
+            resumo = traceback.StackSummary.extract(traceback.walk_stack(frame), lookup_lines=False)
+            pilha = tuple(
+                f"{quadro.filename}:{quadro.lineno} ({quadro.name})"
+                for quadro in reversed(resumo)
+            )
+            self.amostras[pilha] += 1
+            self.total_amostras += 1
+            self._parar.wait(self.intervalo)
+
+
+def registrar_ramo(ramo: str):
+    """Marca qual ramo de processar_pergunta_service foi percorrido (banco, escopo, llm, fallback)."""
+    _contexto_local.ramo = ramo
+
+
+@contextmanager
+def perfilar_requisicao(pergunta: str):
+    """
+    Mede a duração da requisição e, se ela ultrapassar PROFILING_LIMIAR_SEGUNDOS,
+    começa a amostrar a pilha da thread até o fim e guarda o perfil no buffer circular.
+    Com PROFILING_ATIVO desligado, não faz nada além de executar o bloco.
+    """
+    if not settings.PROFILING_ATIVO:
+        yield
+        return
+
+    _contexto_local.ramo = "desconhecido"
+    thread_id = threading.get_ident()
+    amostrador: Optional[_AmostradorPilha] = None
+
+    def _iniciar_amostragem():
+        nonlocal amostrador
+        amostrador = _AmostradorPilha(thread_id, settings.PROFILING_INTERVALO_AMOSTRAGEM)
+        amostrador.iniciar()
+
+    timer = threading.Timer(settings.PROFILING_LIMIAR_SEGUNDOS, _iniciar_amostragem)
+    timer.daemon = True
+    inicio = time.perf_counter()
+    timer.start()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        timer.cancel()
+        timer.join()  # garante que _iniciar_amostragem não está rodando em paralelo
+        ramo = getattr(_contexto_local, "ramo", "desconhecido")
+        _contexto_local.ramo = None
+        if amostrador is not None:
+            amostrador.parar()
+
+        if duracao >= settings.PROFILING_LIMIAR_SEGUNDOS:
+            _guardar_perfil(pergunta, ramo, duracao, amostrador)
+
+
+def _guardar_perfil(pergunta: str, ramo: str, duracao: float, amostrador: Optional[_AmostradorPilha]):
+    pilhas: List[PilhaAmostradaModel] = []
+    total_amostras = 0
+    if amostrador is not None:
+        total_amostras = amostrador.total_amostras
+        for pilha, contagem in amostrador.amostras.most_common(settings.PROFILING_MAX_PILHAS):
+            pilhas.append(PilhaAmostradaModel(quadros=list(pilha), amostras=contagem))
+
+    perfil = PerfilRequisicaoModel(
+        pergunta=pergunta,
+        ramo=ramo,
+        duracao_segundos=round(duracao, 3),
+        total_amostras=total_amostras,
+        pilhas_mais_frequentes=pilhas,
+        data_hora=datetime.now()
+    )
+    with _perfis_lock:
+        _perfis_lentos.append(perfil)
+    print(f"⚠️ Requisição lenta ({duracao:.2f}s, ramo: {ramo}) perfilada.")
+
+
+def listar_perfis_service() -> List[PerfilRequisicaoModel]:
+    """Retorna os perfis guardados, do mais recente para o mais antigo."""
+    with _perfis_lock:
+        return list(reversed(_perfis_lentos))
+
+
+def limpar_perfis_service():
+    with _perfis_lock:
+        _perfis_lentos.clear()
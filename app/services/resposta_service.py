@@ -1,7 +1,10 @@
+from typing import Optional
 from app.core.config import settings
 from app.core.llm_config import get_conversation_chain
 from app.services.conversa_service import consultar_resposta_banco_service, salvar_conversa_service
 from app.services.curso_service import sugerir_curso_service
+from app.services.profiling_service import registrar_ramo
+from app.services.escopo_service import classificar_fora_escopo, registrar_pergunta_filtrada
 from app.models.pydantic_models import RespostaOutputModel, CursoSugestaoModel, PerguntaInputModel
 import urllib.parse
 import re
@@ -99,7 +102,7 @@ def processar_pergunta_service(pergunta_input: PerguntaInputModel) -> RespostaOu
     
     if not pergunta_texto:
         # Comportamento do script original para pergunta vazia
-        pergunta_texto = "Quem é vc ? Apresente-se."
+        pergunta_texto = settings.PERGUNTA_APRESENTACAO
 
     # 0. Tentar consultar resposta no banco antes de chamar o LLM
     resposta_do_banco = consultar_resposta_banco_service(pergunta_texto)
@@ -111,6 +114,7 @@ def processar_pergunta_service(pergunta_input: PerguntaInputModel) -> RespostaOu
 
     if resposta_do_banco:
         print("Resposta encontrada diretamente no banco de dados.")
+        registrar_ramo("banco")
         origem_final = "Fonte Primária - Banco de Dados (Consulta Direta por Similaridade)"
         # Adicionar sugestão de curso e links de documentação se aplicável
         resposta_final_formatada = f"{resposta_do_banco}"
@@ -132,12 +136,34 @@ def processar_pergunta_service(pergunta_input: PerguntaInputModel) -> RespostaOu
             links_documentacao=links_doc
         )
 
-    # 1. Preparar o LLM e o prompt
+    # 1. Pré-filtro local de escopo: evita a chamada ao LLM só para receber a recusa padrão
+    if settings.ESCOPO_PREFILTRO_ATIVO:
+        fora_do_escopo, confianca = classificar_fora_escopo(pergunta_texto)
+        if fora_do_escopo and settings.ESCOPO_MODO_SOMBRA:
+            # Modo sombra: só registra o que seria filtrado; a resposta do LLM é salva e permite conferir o acerto
+            print(f"[modo sombra] Pergunta seria filtrada (confiança {confianca:.2f}): {pergunta_texto}")
+            registrar_pergunta_filtrada(pergunta_texto, confianca, sombra=True)
+        elif fora_do_escopo:
+            print(f"Pergunta fora do escopo (confiança {confianca:.2f}), LLM não será chamado: {pergunta_texto}")
+            registrar_ramo("escopo")
+            # Não salvamos a conversa para que o classificador não seja retreinado com as próprias previsões;
+            # as perguntas filtradas recentes ficam disponíveis em /admin/escopo
+            registrar_pergunta_filtrada(pergunta_texto, confianca, sombra=False)
+            return RespostaOutputModel(
+                pergunta_original=pergunta_texto,
+                texto_resposta=settings.RESPOSTA_FORA_ESCOPO,
+                origem_resposta="Pré-filtro de Escopo Local",
+                sugestao_curso=None,
+                links_documentacao=[]
+            )
+
+    # 2. Preparar o LLM e o prompt
     # Tenta OpenRouter primeiro, fallback para Groq se configurado no llm_config
     try:
         chat_chain = get_conversation_chain(llm_preference="openrouter") 
     except Exception as e:
         print(f"Falha ao obter chat_chain: {e}")
+        registrar_ramo("fallback")
         # Tratar erro de LLM não disponível
         return RespostaOutputModel(
             pergunta_original=pergunta_texto,
@@ -178,14 +204,15 @@ def processar_pergunta_service(pergunta_input: PerguntaInputModel) -> RespostaOu
     else:
         input_llm = pergunta_texto
 
+    registrar_ramo("llm")
     print(f"Enviando para LLM: {input_llm[:200]}...") # Log do input
     resposta_bruta_llm = chat_chain.run(input_llm)
     print(f"Resposta bruta do LLM: {resposta_bruta_llm[:200]}...")
 
-    # 2. Verificar a origem da resposta do LLM
+    # 3. Verificar a origem da resposta do LLM
     origem_resposta_llm = verificar_origem_resposta_service(pergunta_texto, resposta_bruta_llm, chat_chain)
 
-    # 3. Formatar a resposta final, adicionando sugestão de curso e links
+    # 4. Formatar a resposta final, adicionando sugestão de curso e links
     resposta_final_formatada = f"{resposta_bruta_llm}"
     
     if sugestao_curso_obj:
@@ -204,7 +231,7 @@ def processar_pergunta_service(pergunta_input: PerguntaInputModel) -> RespostaOu
         url_pesquisa = f"https://www.google.com/search?q={urllib.parse.quote(pergunta_texto)}"
         resposta_final_formatada += f"\n\n🔗 **Para mais informações, consulte: {url_pesquisa}**"
 
-    # 4. Salvar a conversa no MongoDB
+    # 5. Salvar a conversa no MongoDB
     salvar_conversa_service(pergunta_texto, resposta_final_formatada, origem_resposta_llm)
 
     return RespostaOutputModel(
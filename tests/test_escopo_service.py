@@ -0,0 +1,155 @@
+import pytest
+
+from app.core.config import settings
+from app.services import escopo_service
+
+RECUSA = "Posso te ajudar apenas com dúvidas sobre Análise de Dados, tudo bem?"
+
+PERGUNTAS_DENTRO = [
+    "o que é variância?", "como calcular a média de uma coluna?", "como remover valores nulos de um dataframe?",
+    "o que é um histograma?", "como fazer um groupby?", "qual a diferença entre média e mediana?",
+    "como ler um arquivo csv?", "o que é desvio padrão?", "como juntar duas tabelas?",
+    "o que é uma chave primária?", "como criar um gráfico de dispersão?", "o que é regressão linear?",
+    "como normalizar os dados?", "o que é outlier e como tratar?", "como filtrar linhas por uma condição?",
+    "o que é um dashboard?", "como criar uma medida no dax?", "o que é etl?", "o que é data warehouse?",
+    "como ordenar os resultados de uma consulta?", "o que é correlação?", "como contar valores únicos?",
+    "qual a diferença entre inner join e left join?", "como fazer uma tabela dinâmica?",
+    "o que é amostragem estatística?", "como tratar dados duplicados?", "o que é um modelo de classificação?",
+    "como dividir dados em treino e teste?", "o que é overfitting?", "como agrupar por mês?",
+    "o que é uma série temporal?", "como calcular percentil?", "o que é um boxplot?",
+    "como converter texto em data?", "o que é análise exploratória de dados?", "como criar uma coluna calculada?",
+    "o que é big query?", "como fazer uma subconsulta?", "o que é cardinalidade?",
+    "como visualizar a distribuição dos dados?", "o que é uma variável categórica?",
+    "como aplicar uma função em cada linha?", "o que é kpi?", "como criar um relatório?",
+    "o que é clusterização?", "como medir a acurácia de um modelo?", "o que é data lake?",
+    "como fazer um pivot?", "quais tipos de gráficos usar para comparar categorias?",
+    "como calcular a taxa de crescimento?",
+]
+
+PERGUNTAS_FORA = [
+    "qual a capital da itália?", "como fazer um bolo de cenoura?", "o que é futebol?",
+    "quem ganhou a copa de 2002?", "qual o melhor filme de 2020?", "como trocar o pneu do carro?",
+    "qual a previsão do tempo amanhã?", "me conta uma piada", "como aprender a tocar violão?",
+    "qual a receita de lasanha?", "quem foi napoleão?", "como cuidar de um cachorro?",
+    "qual a altura do monte everest?", "como fazer uma tatuagem?", "me indica uma série para assistir",
+    "qual o sentido da vida?", "como ganhar dinheiro rápido?", "quem é o presidente do brasil?",
+    "como plantar tomate?", "qual a melhor praia do nordeste?", "como fazer um site em wordpress?",
+    "qual o preço do dólar hoje?", "como emagrecer rápido?", "quem escreveu dom casmurro?",
+    "qual o maior planeta do sistema solar?", "como consertar uma torneira?",
+    "me ajuda com o dever de história", "qual o horóscopo de leão?", "como jogar xadrez?",
+    "qual a melhor marca de celular?",
+]
+
+
+class ColecaoFalsa:
+    def __init__(self, documentos):
+        self.documentos = documentos
+
+    def find(self, *args, **kwargs):
+        return list(self.documentos)
+
+
+def _historico(dentro, fora):
+    return [{"pergunta": p, "resposta": "Resposta sobre dados."} for p in dentro] + \
+           [{"pergunta": p, "resposta": RECUSA} for p in fora]
+
+
+@pytest.fixture(autouse=True)
+def estado_limpo(monkeypatch):
+    # Isola o estado global do módulo e evita treinos em segundo plano durante os testes
+    monkeypatch.setattr(escopo_service, "_classificador", None)
+    monkeypatch.setattr(escopo_service, "_termos_escopo", [])
+    monkeypatch.setattr(escopo_service, "_chamadas_llm_evitadas", 0)
+    monkeypatch.setattr(escopo_service, "_sinalizadas_modo_sombra", 0)
+    monkeypatch.setattr(escopo_service, "_perguntas_filtradas", escopo_service.deque(maxlen=3))
+    monkeypatch.setattr(escopo_service, "iniciar_treinamento_escopo", lambda: None)
+    monkeypatch.setattr(settings, "ESCOPO_LIMIAR_CONFIANCA", 0.85)
+    monkeypatch.setattr(settings, "ESCOPO_PRECISAO_MINIMA", 0.95)
+    monkeypatch.setattr(settings, "ESCOPO_MIN_EXEMPLOS_POR_CLASSE", 20)
+
+
+def _treinar(monkeypatch, documentos):
+    monkeypatch.setattr(escopo_service, "get_db_collection", lambda: ColecaoFalsa(documentos))
+    return escopo_service.treinar_classificador_escopo_service()
+
+
+@pytest.mark.parametrize("resposta", [
+    RECUSA,
+    "Posso te ajudar apenas com dúvidas sobre Análise de Dados. Tudo bem?",
+    "Desculpe! Posso te ajudar apenas com dúvidas sobre análise de dados.",
+    "posso te ajudar apenas com duvidas sobre analise de dados",
+])
+def test_rotula_variacoes_da_recusa(resposta):
+    assert escopo_service.eh_resposta_fora_escopo(resposta)
+
+
+def test_nao_rotula_resposta_normal():
+    assert not escopo_service.eh_resposta_fora_escopo("O Pandas é uma biblioteca de análise de dados.")
+
+
+def test_vocabulario_casa_termos_com_pontuacao():
+    termos = escopo_service._montar_vocabulario()
+    assert "cloud sql (gcp)" in termos
+    assert escopo_service._mencionou_vocabulario("Como conectar no Cloud SQL (GCP)?", termos)
+    assert escopo_service._mencionou_vocabulario("o que é pandas?", termos)
+    assert not escopo_service._mencionou_vocabulario("o que é expandas?", termos)
+
+
+def test_poucos_exemplos_por_classe_nao_ativam_o_filtro(monkeypatch):
+    estatisticas = _treinar(monkeypatch, _historico(["o que é python?"], ["como fazer um bolo de cenoura?"]))
+
+    assert not estatisticas.treinado
+    assert escopo_service.classificar_fora_escopo("como fazer um bolo de chocolate?") == (False, 0.0)
+    assert escopo_service.classificar_fora_escopo("como fazer um dashboard?") == (False, 0.0)
+
+
+def test_precisao_abaixo_do_minimo_nao_ativa_o_filtro(monkeypatch):
+    monkeypatch.setattr(settings, "ESCOPO_PRECISAO_MINIMA", 1.01)
+
+    estatisticas = _treinar(monkeypatch, _historico(PERGUNTAS_DENTRO, PERGUNTAS_FORA))
+
+    assert not estatisticas.treinado
+    assert estatisticas.precisao_validacao is not None
+    assert escopo_service.classificar_fora_escopo("qual a capital da frança?") == (False, 0.0)
+
+
+def test_filtra_pergunta_fora_do_escopo_com_historico_suficiente(monkeypatch):
+    estatisticas = _treinar(monkeypatch, _historico(PERGUNTAS_DENTRO, PERGUNTAS_FORA))
+
+    assert estatisticas.treinado
+    assert estatisticas.precisao_validacao >= settings.ESCOPO_PRECISAO_MINIMA
+    assert estatisticas.regularizacao_c in escopo_service.CANDIDATOS_REGULARIZACAO_C
+
+    fora, confianca = escopo_service.classificar_fora_escopo("qual a capital da itália?")
+    assert fora and confianca >= settings.ESCOPO_LIMIAR_CONFIANCA
+    for pergunta in ["como fazer um dashboard?", "como calcular a mediana de uma coluna?",
+                     "como remover valores nulos de uma tabela?"]:
+        assert not escopo_service.classificar_fora_escopo(pergunta)[0], pergunta
+
+
+def test_vocabulario_nunca_e_filtrado(monkeypatch):
+    _treinar(monkeypatch, _historico(PERGUNTAS_DENTRO, PERGUNTAS_FORA))
+
+    assert escopo_service.classificar_fora_escopo("qual a capital da itália no pandas?") == (False, 0.0)
+
+
+def test_limiar_de_confianca(monkeypatch):
+    _treinar(monkeypatch, _historico(PERGUNTAS_DENTRO, PERGUNTAS_FORA))
+    monkeypatch.setattr(settings, "ESCOPO_LIMIAR_CONFIANCA", 1.0)
+
+    fora, confianca = escopo_service.classificar_fora_escopo("qual a capital da itália?")
+    assert not fora
+    assert 0.0 < confianca < 1.0
+
+
+def test_contadores_e_buffer_de_perguntas_filtradas():
+    escopo_service.registrar_pergunta_filtrada("q1", 0.9, sombra=False)
+    escopo_service.registrar_pergunta_filtrada("q2", 0.9, sombra=True)
+    escopo_service.registrar_pergunta_filtrada("q3", 0.9, sombra=False)
+    escopo_service.registrar_pergunta_filtrada("q4", 0.9, sombra=False)
+
+    estatisticas = escopo_service.get_estatisticas_escopo_service()
+    assert estatisticas.chamadas_llm_evitadas == 3
+    assert estatisticas.sinalizadas_modo_sombra == 1
+    assert [p.pergunta for p in estatisticas.perguntas_filtradas_recentes] == ["q4", "q3", "q2"]
+    assert [p.sombra for p in estatisticas.perguntas_filtradas_recentes] == [False, False, True]